@@ -1,12 +1,21 @@
 import os
 import json
+import re
 import hmac
 import hashlib
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from groq import Groq
 from dotenv import load_dotenv
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
 import logging
+import heapq
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 # Load environment variables
 load_dotenv()
@@ -23,12 +32,23 @@ for var in proxy_vars:
         del os.environ[var]
 
 # Initialize Flask app
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson for faster payload parsing and response encoding."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 
 # --- Configuration ---
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+WEBHOOK_SECRET_BYTES = WEBHOOK_SECRET.encode('utf-8') if WEBHOOK_SECRET else None
 
 # Discord Configuration
 DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL")
@@ -41,6 +61,100 @@ if missing_vars:
     logger.error(f"Missing required environment variables: {', '.join(missing_vars)}")
     raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
+# --- In-memory Caches ---
+class LRUCache:
+    """Small thread-safe LRU mapping shared by the request-handling threads."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+# --- HTTP Sessions ---
+class LoggingRetry(Retry):
+    """urllib3 Retry policy that logs every retry so rate-limit pressure shows up in the logs."""
+
+    def increment(self, method=None, url=None, response=None, error=None, *args, **kwargs):
+        # super() raises MaxRetryError once retries are exhausted, so only scheduled retries get logged
+        new_retry = super().increment(method, url, response, error, *args, **kwargs)
+        reason = f"HTTP {response.status}" if response is not None else error
+        logger.warning(f"Retrying {method} {url} after {reason}")
+        return new_retry
+
+def create_session(retry, headers=None):
+    """Create a pooled HTTP session so keep-alive connections are reused across calls."""
+    session = requests.Session()
+    if headers:
+        session.headers.update(headers)
+    adapter = HTTPAdapter(
+        pool_connections=2,
+        pool_maxsize=10,
+        max_retries=retry
+    )
+    session.mount("https://", adapter)
+    return session
+
+# GitHub: retry rate limits and transient gateway errors with exponential backoff, honoring Retry-After
+GH_SESSION = create_session(
+    LoggingRetry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=[429, 502, 503, 504],
+        allowed_methods=['GET'],
+        respect_retry_after_header=True
+    ),
+    {
+        "Authorization": f"Bearer {GITHUB_TOKEN}",
+        "Accept": "application/vnd.github+json",
+        "X-GitHub-Api-Version": "2022-11-28"
+    }
+)
+
+# Discord: only retry 429s and connect failures, which happen before delivery, so a retried POST
+# can't duplicate a message; read errors may follow an accepted post and are never retried
+DISCORD_SESSION = create_session(
+    LoggingRetry(
+        total=3,
+        read=False,
+        other=False,
+        backoff_factor=0.5,
+        status_forcelist=[429],
+        allowed_methods=['POST'],
+        respect_retry_after_header=True
+    ),
+    {"Content-Type": "application/json"}
+)
+
+# Shared worker pool for concurrent GitHub API fetches (sized to the session's connection pool)
+GITHUB_EXECUTOR = ThreadPoolExecutor(max_workers=10, thread_name_prefix="github-fetch")
+
+# LRU cache of GitHub responses keyed by URL, holding (etag, extracted_data) for conditional requests
+GITHUB_RESPONSE_CACHE = LRUCache(max_entries=1024)
+
+# LRU cache of generated summaries keyed by a digest of the full Groq prompt
+SUMMARY_CACHE = LRUCache(max_entries=256)
+
+# Groq client shared across requests (created lazily by get_groq_client)
+_groq_client = None
+_groq_client_lock = threading.Lock()
+
+# Background worker pool so webhook deliveries are acknowledged before the PR is analyzed
+EVENT_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="pr-event")
+
 # --- GitHub Webhook Verification ---
 def verify_github_signature(payload_body, signature_header):
     """Verify GitHub webhook signature for security."""
@@ -52,15 +166,15 @@ def verify_github_signature(payload_body, signature_header):
         logger.error("No signature header provided")
         return False
     
+    if not signature_header.startswith('sha256='):
+        logger.error("Unsupported signature format")
+        return False
+    
     try:
-        hash_object = hmac.new(
-            WEBHOOK_SECRET.encode('utf-8'),
-            payload_body,
-            hashlib.sha256
-        )
-        expected_signature = "sha256=" + hash_object.hexdigest()
+        expected_signature = hmac.digest(WEBHOOK_SECRET_BYTES, payload_body, 'sha256')
+        received_signature = bytes.fromhex(signature_header[len('sha256='):])
         
-        if not hmac.compare_digest(expected_signature, signature_header):
+        if not hmac.compare_digest(expected_signature, received_signature):
             logger.error("Invalid signature")
             return False
         
@@ -70,116 +184,145 @@ def verify_github_signature(payload_body, signature_header):
         return False
 
 # --- Function to get comprehensive PR information ---
+def fetch_github_json(url, extract):
+    """GET a GitHub API URL over the pooled session and return the fields picked by extract.
+
+    Only the extracted fields are kept, so large unused parts of GitHub's
+    responses (links, nested repo/user objects, file patches) are released
+    right after parsing. Results are cached by URL together with their ETag;
+    repeat requests send If-None-Match and reuse the cached result when GitHub
+    answers 304 Not Modified.
+    """
+    cached = GITHUB_RESPONSE_CACHE.get(url)
+    
+    headers = {"If-None-Match": cached[0]} if cached else None
+    response = GH_SESSION.get(url, headers=headers)
+    
+    if cached and response.status_code == 304:
+        logger.debug(f"GitHub cache hit (304) for {url}")
+        return cached[1]
+    
+    response.raise_for_status()
+    data = extract(orjson.loads(response.content))
+    
+    etag = response.headers.get('ETag')
+    if etag:
+        GITHUB_RESPONSE_CACHE.put(url, (etag, data))
+    
+    return data
+
+# --- Field extraction for GitHub API responses ---
+def extract_pr_basic(pr_data):
+    """Keep the PR metadata fields used for the summary and Discord embeds."""
+    return {
+        'title': pr_data.get('title', ''),
+        'description': pr_data.get('body', ''),
+        'state': pr_data.get('state', ''),
+        'created_at': pr_data.get('created_at', ''),
+        'updated_at': pr_data.get('updated_at', ''),
+        'user': pr_data.get('user', {}).get('login', ''),
+        'base_branch': pr_data.get('base', {}).get('ref', ''),
+        'head_branch': pr_data.get('head', {}).get('ref', ''),
+        'additions': pr_data.get('additions', 0),
+        'deletions': pr_data.get('deletions', 0),
+        'changed_files': pr_data.get('changed_files', 0),
+        'url': pr_data.get('html_url', '')
+    }
+
+def extract_review_comments(comments_data):
+    """Keep the fields used from PR review (code) comments."""
+    return [
+        {
+            'user': comment.get('user', {}).get('login', ''),
+            'body': comment.get('body', ''),
+            'created_at': comment.get('created_at', ''),
+            'path': comment.get('path', ''),
+            'line': comment.get('line', '')
+        }
+        for comment in comments_data
+    ]
+
+def extract_issue_comments(comments_data):
+    """Keep the fields used from issue (discussion) comments."""
+    return [
+        {
+            'user': comment.get('user', {}).get('login', ''),
+            'body': comment.get('body', ''),
+            'created_at': comment.get('created_at', '')
+        }
+        for comment in comments_data
+    ]
+
+def extract_reviews(reviews_data):
+    """Keep the fields used from PR reviews."""
+    return [
+        {
+            'user': review.get('user', {}).get('login', ''),
+            'state': review.get('state', ''),
+            'body': review.get('body', ''),
+            'submitted_at': review.get('submitted_at', '')
+        }
+        for review in reviews_data
+    ]
+
+def extract_files(files_data):
+    """Keep per-file change stats, dropping patch and blob/raw/contents URLs."""
+    return [
+        {
+            'filename': file_info.get('filename', ''),
+            'status': file_info.get('status', ''),
+            'additions': file_info.get('additions', 0),
+            'deletions': file_info.get('deletions', 0),
+            'changes': file_info.get('changes', 0)
+        }
+        for file_info in files_data
+    ]
+
 def get_pr_comprehensive_info(owner, repo, pr_number):
     """Fetches comprehensive PR information including comments, reviews, and metadata."""
     base_url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{pr_number}"
-    headers = {
-        "Authorization": f"Bearer {GITHUB_TOKEN}",
-        "Accept": "application/vnd.github+json",
-        "X-GitHub-Api-Version": "2022-11-28"
-    }
     
     pr_info = {}
     
     try:
-        # Get basic PR information
-        logger.info(f"Fetching PR details for {owner}/{repo}#{pr_number}")
-        response = requests.get(base_url, headers=headers)
-        response.raise_for_status()
-        pr_data = response.json()
-        
-        pr_info['basic'] = {
-            'title': pr_data.get('title', ''),
-            'description': pr_data.get('body', ''),
-            'state': pr_data.get('state', ''),
-            'created_at': pr_data.get('created_at', ''),
-            'updated_at': pr_data.get('updated_at', ''),
-            'user': pr_data.get('user', {}).get('login', ''),
-            'base_branch': pr_data.get('base', {}).get('ref', ''),
-            'head_branch': pr_data.get('head', {}).get('ref', ''),
-            'additions': pr_data.get('additions', 0),
-            'deletions': pr_data.get('deletions', 0),
-            'changed_files': pr_data.get('changed_files', 0),
-            'url': pr_data.get('html_url', '')
-        }
+        # Issue all GitHub requests concurrently; the sub-resources don't depend on the PR details
+        logger.info(f"Fetching PR details, comments, reviews and files for {owner}/{repo}#{pr_number}")
+        basic_future = GITHUB_EXECUTOR.submit(fetch_github_json, base_url, extract_pr_basic)
+        comments_future = GITHUB_EXECUTOR.submit(fetch_github_json, f"{base_url}/comments", extract_review_comments)
+        issue_comments_future = GITHUB_EXECUTOR.submit(
+            fetch_github_json, f"https://api.github.com/repos/{owner}/{repo}/issues/{pr_number}/comments", extract_issue_comments
+        )
+        reviews_future = GITHUB_EXECUTOR.submit(fetch_github_json, f"{base_url}/reviews", extract_reviews)
+        # Ask for the maximum page size so large PRs are covered by this single request
+        files_future = GITHUB_EXECUTOR.submit(fetch_github_json, f"{base_url}/files?per_page=100", extract_files)
+        
+        # Get basic PR information (copied, since callers add fields to it and the cached dict is shared)
+        pr_info['basic'] = dict(basic_future.result())
         
         # Get PR comments
-        logger.info("Fetching PR comments...")
         try:
-            comments_url = f"{base_url}/comments"
-            comments_response = requests.get(comments_url, headers=headers)
-            comments_response.raise_for_status()
-            comments_data = comments_response.json()
-            
-            pr_info['comments'] = []
-            for comment in comments_data:
-                pr_info['comments'].append({
-                    'user': comment.get('user', {}).get('login', ''),
-                    'body': comment.get('body', ''),
-                    'created_at': comment.get('created_at', ''),
-                    'path': comment.get('path', ''),
-                    'line': comment.get('line', '')
-                })
+            pr_info['comments'] = comments_future.result()
         except Exception as e:
             logger.warning(f"Could not fetch PR comments: {e}")
             pr_info['comments'] = []
         
         # Get issue comments (general PR discussion)
-        logger.info("Fetching issue comments...")
         try:
-            issue_comments_url = f"https://api.github.com/repos/{owner}/{repo}/issues/{pr_number}/comments"
-            issue_comments_response = requests.get(issue_comments_url, headers=headers)
-            issue_comments_response.raise_for_status()
-            issue_comments_data = issue_comments_response.json()
-            
-            pr_info['issue_comments'] = []
-            for comment in issue_comments_data:
-                pr_info['issue_comments'].append({
-                    'user': comment.get('user', {}).get('login', ''),
-                    'body': comment.get('body', ''),
-                    'created_at': comment.get('created_at', '')
-                })
+            pr_info['issue_comments'] = issue_comments_future.result()
         except Exception as e:
             logger.warning(f"Could not fetch issue comments: {e}")
             pr_info['issue_comments'] = []
         
         # Get PR reviews
-        logger.info("Fetching PR reviews...")
         try:
-            reviews_url = f"{base_url}/reviews"
-            reviews_response = requests.get(reviews_url, headers=headers)
-            reviews_response.raise_for_status()
-            reviews_data = reviews_response.json()
-            
-            pr_info['reviews'] = []
-            for review in reviews_data:
-                pr_info['reviews'].append({
-                    'user': review.get('user', {}).get('login', ''),
-                    'state': review.get('state', ''),
-                    'body': review.get('body', ''),
-                    'submitted_at': review.get('submitted_at', '')
-                })
+            pr_info['reviews'] = reviews_future.result()
         except Exception as e:
             logger.warning(f"Could not fetch PR reviews: {e}")
             pr_info['reviews'] = []
         
         # Get files changed (with basic info, not full diff)
-        logger.info("Fetching changed files list...")
         try:
-            files_url = f"{base_url}/files"
-            files_response = requests.get(files_url, headers=headers)
-            files_response.raise_for_status()
-            files_data = files_response.json()
-            
-            pr_info['files'] = []
-            for file_info in files_data:
-                pr_info['files'].append({
-                    'filename': file_info.get('filename', ''),
-                    'status': file_info.get('status', ''),
-                    'additions': file_info.get('additions', 0),
-                    'deletions': file_info.get('deletions', 0),
-                    'changes': file_info.get('changes', 0)
-                })
+            pr_info['files'] = files_future.result()
         except Exception as e:
             logger.warning(f"Could not fetch files: {e}")
             pr_info['files'] = []
@@ -194,36 +337,49 @@ def get_pr_comprehensive_info(owner, repo, pr_number):
         raise
 
 # --- Function to format PR summary for Discord ---
+# Embed colors and title emoji by event action
+ACTION_COLORS = {
+    'opened': 0x00ff00,      # Green for new PRs
+    'synchronize': 0x0099ff,  # Blue for updates
+    'reopened': 0xffa500,     # Orange for reopened
+    'closed': 0x6f42c1,       # Purple for closed
+    'ready_for_review': 0x00ff7f  # Spring green for ready
+}
+
+ACTION_EMOJI = {
+    'opened': '🆕',
+    'synchronize': '🔄',
+    'reopened': '🔄',
+    'ready_for_review': '👀'
+}
+
+# Emoji for review states and changed-file statuses (shared by the prompt and the Discord embeds)
+REVIEW_STATE_EMOJI = {"APPROVED": "✅", "CHANGES_REQUESTED": "❌", "COMMENTED": "💭"}
+FILE_STATUS_EMOJI = {"added": "🆕", "modified": "✏️", "removed": "🗑️", "renamed": "📝"}
+
 def format_for_discord(pr_info, summary, event_action=None):
     """Format the PR analysis for Discord with proper markdown and embeds."""
+    basic = pr_info['basic']
     
-    # Different colors based on event action
-    color_map = {
-        'opened': 0x00ff00,      # Green for new PRs
-        'synchronize': 0x0099ff,  # Blue for updates
-        'reopened': 0xffa500,     # Orange for reopened
-        'closed': 0x6f42c1,       # Purple for closed
-        'ready_for_review': 0x00ff7f  # Spring green for ready
-    }
+    if event_action == 'closed':
+        emoji = '✅' if basic.get('merged') else '❌'
+    else:
+        emoji = ACTION_EMOJI.get(event_action, '🔍')
     
-    action_emoji = {
-        'opened': '🆕',
-        'synchronize': '🔄',
-        'reopened': '🔄',
-        'closed': '✅' if pr_info['basic'].get('merged') else '❌',
-        'ready_for_review': '👀'
-    }
+    title = basic['title']
+    if len(title) > 100:
+        title = title[:100] + '...'
     
     # Create main embed for PR overview
     embed = {
-        "title": f"{action_emoji.get(event_action, '🔍')} PR {event_action.title() if event_action else 'Analysis'}: {pr_info['basic']['title'][:100]}{'...' if len(pr_info['basic']['title']) > 100 else ''}",
-        "description": f"**Author:** {pr_info['basic']['user']}\n**Branch:** `{pr_info['basic']['head_branch']}` → `{pr_info['basic']['base_branch']}`",
-        "url": pr_info['basic']['url'],
-        "color": color_map.get(event_action, 0x00ff00 if pr_info['basic']['state'] == 'open' else 0x6f42c1),
+        "title": f"{emoji} PR {event_action.title() if event_action else 'Analysis'}: {title}",
+        "description": f"**Author:** {basic['user']}\n**Branch:** `{basic['head_branch']}` → `{basic['base_branch']}`",
+        "url": basic['url'],
+        "color": ACTION_COLORS.get(event_action, 0x00ff00 if basic['state'] == 'open' else 0x6f42c1),
         "fields": [
             {
                 "name": "📊 Statistics",
-                "value": f"**Files:** {pr_info['basic']['changed_files']}\n**Changes:** +{pr_info['basic']['additions']} -{pr_info['basic']['deletions']}",
+                "value": f"**Files:** {basic['changed_files']}\n**Changes:** +{basic['additions']} -{basic['deletions']}",
                 "inline": True
             },
             {
@@ -232,15 +388,54 @@ def format_for_discord(pr_info, summary, event_action=None):
                 "inline": True
             }
         ],
-        "timestamp": pr_info['basic']['updated_at'],
+        "timestamp": basic['updated_at'],
         "footer": {
-            "text": f"PR #{pr_info['basic'].get('number', 'Unknown')} • {pr_info['basic']['state'].title()}"
+            "text": f"PR #{basic.get('number', 'Unknown')} • {basic['state'].title()}"
         }
     }
     
     return embed
 
+# --- Function to group embeds into Discord messages ---
+DISCORD_MAX_EMBEDS_PER_MESSAGE = 10
+DISCORD_MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+def embed_text_length(embed):
+    """Count the characters of an embed that Discord applies its per-message limit to."""
+    length = len(embed.get('title', '')) + len(embed.get('description', ''))
+    length += len(embed.get('footer', {}).get('text', ''))
+    for field in embed.get('fields', []):
+        length += len(field.get('name', '')) + len(field.get('value', ''))
+    return length
+
+def batch_discord_embeds(embeds):
+    """Group embeds into as few webhook messages as Discord's embed count and size limits allow."""
+    batches = []
+    current_batch = []
+    current_length = 0
+    
+    for embed in embeds:
+        length = embed_text_length(embed)
+        if current_batch and (len(current_batch) >= DISCORD_MAX_EMBEDS_PER_MESSAGE
+                              or current_length + length > DISCORD_MAX_EMBED_CHARS_PER_MESSAGE):
+            batches.append(current_batch)
+            current_batch = []
+            current_length = 0
+        current_batch.append(embed)
+        current_length += length
+    
+    if current_batch:
+        batches.append(current_batch)
+    
+    return batches
+
 # --- Function to send message to Discord ---
+# Webhook display identity shared by every message the bot posts
+BOT_IDENTITY = {
+    "username": "GitHub PR Bot",
+    "avatar_url": "https://github.githubassets.com/images/modules/logos_page/GitHub-Mark.png"
+}
+
 def send_to_discord(pr_info, summary, event_action=None):
     """Send the PR analysis to Discord using webhook."""
     
@@ -254,81 +449,67 @@ def send_to_discord(pr_info, summary, event_action=None):
         if len(summary) > 1900:  # Discord embed description limit is ~2048
             # Split summary into sections
             sections = summary.split('\n\n')
-            current_chunk = ""
+            current_sections = []
+            current_length = 0
             
+            # Track the chunk length arithmetically and only join each chunk once
             for section in sections:
-                if len(current_chunk + section) > 1900:
-                    if current_chunk:
-                        summary_chunks.append(current_chunk.strip())
-                    current_chunk = section
+                added_length = len(section) + (2 if current_sections else 0)
+                if current_sections and current_length + added_length > 1900:
+                    summary_chunks.append('\n\n'.join(current_sections).strip())
+                    current_sections = [section]
+                    current_length = len(section)
                 else:
-                    current_chunk += "\n\n" + section if current_chunk else section
+                    current_sections.append(section)
+                    current_length += added_length
             
-            if current_chunk:
-                summary_chunks.append(current_chunk.strip())
+            if current_sections:
+                summary_chunks.append('\n\n'.join(current_sections).strip())
         else:
             summary_chunks = [summary]
         
-        # Create main embed
-        main_embed = format_for_discord(pr_info, summary, event_action)
-        
-        # Send main message with first part of summary
-        webhook_data = {
-            "username": "GitHub PR Bot",
-            "avatar_url": "https://github.githubassets.com/images/modules/logos_page/GitHub-Mark.png",
-            "embeds": [main_embed],
-            "content": f"<@{DISCORD_USER_ID}> PR {event_action or 'analysis'} notification! 🚀" if DISCORD_USER_ID else f"PR {event_action or 'analysis'} notification! 🚀"
-        }
-        
-        response = requests.post(DISCORD_WEBHOOK_URL, json=webhook_data)
-        response.raise_for_status()
-        logger.info("Main PR info sent to Discord successfully!")
+        # Collect every embed so they can be delivered in as few webhook calls as possible
+        embeds = [format_for_discord(pr_info, summary, event_action)]
         
-        # Send summary in separate messages/embeds
         for i, chunk in enumerate(summary_chunks):
-            summary_embed = {
+            embeds.append({
                 "title": f"📋 Analysis Summary {f'(Part {i+1}/{len(summary_chunks)})' if len(summary_chunks) > 1 else ''}",
                 "description": chunk,
                 "color": 0x0099ff,
                 "footer": {
                     "text": f"Generated by AI • {len(chunk)} chars"
                 }
-            }
-            
-            chunk_data = {
-                "username": "GitHub PR Bot",
-                "avatar_url": "https://github.githubassets.com/images/modules/logos_page/GitHub-Mark.png",
-                "embeds": [summary_embed]
-            }
-            
-            response = requests.post(DISCORD_WEBHOOK_URL, json=chunk_data)
-            response.raise_for_status()
-            logger.info(f"Summary part {i+1} sent to Discord!")
+            })
         
-        # Only send additional info if there are significant reviews (optional, based on importance)
+        # Only add review info if there are significant reviews (optional, based on importance)
         if pr_info.get('reviews') and len(pr_info['reviews']) > 1:  # Only if multiple reviews
-            review_text = ""
+            review_lines = []
             for review in pr_info['reviews'][-2:]:  # Last 2 reviews only
-                status_emoji = {"APPROVED": "✅", "CHANGES_REQUESTED": "❌", "COMMENTED": "💭"}.get(review['state'], "📝")
-                review_text += f"{status_emoji} **{review['user']}**: {review['body'][:80] if review['body'] else 'No comment'}\n"
+                status_emoji = REVIEW_STATE_EMOJI.get(review['state'], "📝")
+                review_lines.append(f"{status_emoji} **{review['user']}**: {review['body'][:80] if review['body'] else 'No comment'}\n")
+            review_text = "".join(review_lines)
             
             if review_text:
-                activity_embed = {
+                embeds.append({
                     "title": "🔍 Key Reviews",
                     "description": review_text[:500],  # Keep it short
                     "color": 0xffa500,
                     "footer": {"text": f"{len(pr_info['reviews'])} total reviews"}
-                }
-                
-                activity_data = {
-                    "username": "GitHub PR Bot",
-                    "avatar_url": "https://github.githubassets.com/images/modules/logos_page/GitHub-Mark.png",
-                    "embeds": [activity_embed]
-                }
-                
-                response = requests.post(DISCORD_WEBHOOK_URL, json=activity_data)
-                response.raise_for_status()
-                logger.info("Key reviews sent to Discord!")
+                })
+        
+        content = f"<@{DISCORD_USER_ID}> PR {event_action or 'analysis'} notification! 🚀" if DISCORD_USER_ID else f"PR {event_action or 'analysis'} notification! 🚀"
+        
+        # Normally a single POST; only split when Discord's per-message embed limits would be exceeded
+        batches = batch_discord_embeds(embeds)
+        for i, batch in enumerate(batches):
+            webhook_data = {**BOT_IDENTITY, "embeds": batch}
+            if i == 0:
+                webhook_data["content"] = content
+            
+            response = DISCORD_SESSION.post(DISCORD_WEBHOOK_URL, data=orjson.dumps(webhook_data))
+            response.raise_for_status()
+        
+        logger.info(f"PR analysis sent to Discord successfully! ({len(embeds)} embeds in {len(batches)} message(s))")
         
         return True
         
@@ -340,36 +521,73 @@ def send_to_discord(pr_info, summary, event_action=None):
         return False
 
 # --- Function to get concise summary from Groq ---
-def get_comprehensive_summary_from_groq(pr_info):
-    """Creates a concise summary prioritizing comments, descriptions, and key changes."""
-    try:
-        # Initialize Groq client with explicit parameters to avoid proxy conflicts
-        logger.debug("Initializing Groq client...")
-        
-        # Create a clean environment for Groq client initialization
-        # Some deployment environments pass proxy settings that Groq doesn't support
-        original_env = os.environ.copy()
-        
-        # Temporarily remove proxy variables during client initialization
-        temp_removed = {}
-        proxy_vars = ['http_proxy', 'https_proxy', 'HTTP_PROXY', 'HTTPS_PROXY', 'no_proxy', 'NO_PROXY', 'proxies']
-        for var in proxy_vars:
-            if var in os.environ:
-                temp_removed[var] = os.environ[var]
-                del os.environ[var]
+# Filename fragments used to flag notable files (matched anywhere in the lowercased path)
+DEPENDENCY_FILE_PATTERN = re.compile('|'.join(map(re.escape, [
+    'package.json', 'package-lock.json', 'requirements.txt', 'composer.json', 'gemfile', 'go.mod', 'cargo.toml', 'poetry.lock'
+])))
+CRITICAL_FILE_PATTERN = re.compile('|'.join(map(re.escape, [
+    'dockerfile', '.env', 'config.js', 'next.config', 'vite.config', 'webpack.config'
+])))
+CONFIG_FILE_PATTERN = re.compile('|'.join(map(re.escape, [
+    '.json', '.yml', '.yaml', '.toml', '.config'
+])))
+
+# Approximate token budgets for each comment section of the prompt (keeps requests well inside Groq limits)
+REVIEW_COMMENT_TOKEN_BUDGET = 600
+DISCUSSION_TOKEN_BUDGET = 300
+REVIEW_TOKEN_BUDGET = 300
+
+def estimate_tokens(text):
+    """Roughly estimate the token count of text (~4 characters per token for Llama-family tokenizers)."""
+    return len(text) // 4 + 1
+
+def pack_lines_by_token_budget(entries, budget):
+    """Keep the highest-scoring (score, line) entries that fit in a token budget, in their original order."""
+    chosen = []
+    used_tokens = 0
+    for index in sorted(range(len(entries)), key=lambda i: entries[i][0], reverse=True):
+        cost = estimate_tokens(entries[index][1])
+        if used_tokens + cost > budget:
+            continue
+        chosen.append(index)
+        used_tokens += cost
+    return [entries[i][1] for i in sorted(chosen)]
+
+def get_groq_client():
+    """Return the shared Groq client, creating it on first use so its HTTP connection pool is reused."""
+    global _groq_client
+    
+    if _groq_client is not None:
+        return _groq_client
+    
+    with _groq_client_lock:
+        if _groq_client is not None:
+            return _groq_client
         
         try:
-            client = Groq(api_key=GROQ_API_KEY)
-            logger.debug("Groq client initialized successfully")
-        finally:
-            # Restore removed environment variables
-            for var, value in temp_removed.items():
-                os.environ[var] = value
-                
-    except TypeError as e:
-        logger.error(f"Groq client initialization failed with TypeError: {e}")
-        # This specific error suggests parameter incompatibility
-        try:
+            # Initialize Groq client with explicit parameters to avoid proxy conflicts
+            logger.debug("Initializing Groq client...")
+            
+            # Some deployment environments pass proxy settings that Groq doesn't support,
+            # so temporarily remove proxy variables during client initialization
+            temp_removed = {}
+            proxy_vars = ['http_proxy', 'https_proxy', 'HTTP_PROXY', 'HTTPS_PROXY', 'no_proxy', 'NO_PROXY', 'proxies']
+            for var in proxy_vars:
+                if var in os.environ:
+                    temp_removed[var] = os.environ[var]
+                    del os.environ[var]
+            
+            try:
+                client = Groq(api_key=GROQ_API_KEY)
+                logger.debug("Groq client initialized successfully")
+            finally:
+                # Restore removed environment variables
+                for var, value in temp_removed.items():
+                    os.environ[var] = value
+                    
+        except TypeError as e:
+            logger.error(f"Groq client initialization failed with TypeError: {e}")
+            # This specific error suggests parameter incompatibility
             # Try with absolutely minimal parameters
             import importlib
             # Reload groq module to clear any cached proxy settings
@@ -378,101 +596,130 @@ def get_comprehensive_summary_from_groq(pr_info):
             from groq import Groq as FreshGroq
             client = FreshGroq(api_key=GROQ_API_KEY)
             logger.info("Groq client initialized with fresh import")
-        except Exception as fallback_error:
-            logger.error(f"Groq client fallback initialization also failed: {fallback_error}")
-            return f"**{pr_info['basic']['title']}**\n\nAuthor: {pr_info['basic']['user']}\nFiles changed: {pr_info['basic']['changed_files']}\nChanges: +{pr_info['basic']['additions']} -{pr_info['basic']['deletions']}\n\nDescription: {pr_info['basic']['description'][:200] if pr_info['basic']['description'] else 'No description provided'}"
+        
+        _groq_client = client
+        return client
+
+def build_basic_summary(basic):
+    """Plain-text summary from PR metadata, used whenever Groq is unavailable."""
+    description = basic['description'][:200] if basic['description'] else 'No description provided'
+    return (
+        f"**{basic['title']}**\n\n"
+        f"Author: {basic['user']}\nFiles changed: {basic['changed_files']}\n"
+        f"Changes: +{basic['additions']} -{basic['deletions']}\n\n"
+        f"Description: {description}"
+    )
+
+def get_comprehensive_summary_from_groq(pr_info):
+    """Creates a concise summary prioritizing comments, descriptions, and key changes."""
+    basic = pr_info['basic']
+    
+    try:
+        client = get_groq_client()
     except Exception as e:
         logger.error(f"Failed to initialize Groq client: {e}")
         # Fallback to basic summary if Groq client fails
-        return f"**{pr_info['basic']['title']}**\n\nAuthor: {pr_info['basic']['user']}\nFiles changed: {pr_info['basic']['changed_files']}\nChanges: +{pr_info['basic']['additions']} -{pr_info['basic']['deletions']}\n\nDescription: {pr_info['basic']['description'][:200] if pr_info['basic']['description'] else 'No description provided'}"
+        return build_basic_summary(basic)
     
     # Prioritize information based on importance
-    description = pr_info['basic']['description'] or ''
+    description = basic['description'] or ''
     has_meaningful_description = len(description.strip()) > 50
     
     # Build comprehensive but focused context for the AI
-    context = f"""
-# PR Analysis: {pr_info['basic']['title']}
+    context_parts = [f"""
+# PR Analysis: {basic['title']}
 
-**Author**: {pr_info['basic']['user']} | **Branch**: {pr_info['basic']['head_branch']} → {pr_info['basic']['base_branch']}
-**Stats**: {pr_info['basic']['changed_files']} files, +{pr_info['basic']['additions']} -{pr_info['basic']['deletions']}
-**Change Scale**: {"Large" if pr_info['basic']['changed_files'] > 20 else "Medium" if pr_info['basic']['changed_files'] > 5 else "Small"} PR
-"""
+**Author**: {basic['user']} | **Branch**: {basic['head_branch']} → {basic['base_branch']}
+**Stats**: {basic['changed_files']} files, +{basic['additions']} -{basic['deletions']}
+**Change Scale**: {"Large" if basic['changed_files'] > 20 else "Medium" if basic['changed_files'] > 5 else "Small"} PR
+"""]
     
     # Always include description if it exists
     if description.strip():
-        context += f"\n## Description\n{description}\n"
+        context_parts.append(f"\n## Description\n{description}\n")
     
     # Track if we have meaningful context beyond basic info
     has_meaningful_context = False
     
     # Priority 1: Code review comments (most valuable insights)
     if pr_info.get('comments'):
-        context += f"\n## Code Review Comments ({len(pr_info['comments'])} total)\n"
-        for comment in pr_info['comments'][:6]:  # Focus on most important comments
-            if len(comment['body']) > 20:  # Skip very short comments
-                context += f"**{comment['user']}** on `{comment['path']}`: {comment['body'][:250]}\n"
-                has_meaningful_context = True
+        context_parts.append(f"\n## Code Review Comments ({len(pr_info['comments'])} total)\n")
+        comment_entries = [
+            (len(comment['body']), f"**{comment['user']}** on `{comment['path']}`: {comment['body'][:250]}\n")
+            for comment in pr_info['comments']
+            if len(comment['body']) > 20  # Skip very short comments
+        ]
+        comment_lines = pack_lines_by_token_budget(comment_entries, REVIEW_COMMENT_TOKEN_BUDGET)
+        context_parts.extend(comment_lines)
+        if comment_lines:
+            has_meaningful_context = True
     
     # Priority 2: General discussion comments
     if pr_info.get('issue_comments'):
-        context += f"\n## Discussion Comments ({len(pr_info['issue_comments'])} total)\n"
-        for comment in pr_info['issue_comments'][:3]:  # Limit discussion
-            if len(comment['body']) > 20:  # Skip very short comments
-                context += f"**{comment['user']}**: {comment['body'][:200]}\n"
-                has_meaningful_context = True
+        context_parts.append(f"\n## Discussion Comments ({len(pr_info['issue_comments'])} total)\n")
+        discussion_entries = [
+            (len(comment['body']), f"**{comment['user']}**: {comment['body'][:200]}\n")
+            for comment in pr_info['issue_comments']
+            if len(comment['body']) > 20  # Skip very short comments
+        ]
+        discussion_lines = pack_lines_by_token_budget(discussion_entries, DISCUSSION_TOKEN_BUDGET)
+        context_parts.extend(discussion_lines)
+        if discussion_lines:
+            has_meaningful_context = True
     
-    # Priority 3: Reviews (concise format)
+    # Priority 3: Reviews (concise format), preferring reviews that request changes
     if pr_info.get('reviews'):
-        context += f"\n## Reviews\n"
+        context_parts.append(f"\n## Reviews\n")
+        review_entries = []
         for review in pr_info['reviews']:
-            status_emoji = {"APPROVED": "✅", "CHANGES_REQUESTED": "❌", "COMMENTED": "💭"}.get(review['state'], "📝")
+            status_emoji = REVIEW_STATE_EMOJI.get(review['state'], "📝")
             review_body = review['body'][:150] if review['body'] else 'No comment'
-            context += f"{status_emoji} **{review['user']}**: {review_body}\n"
+            score = (len(review['body'] or '') + 1) * (2 if review['state'] == 'CHANGES_REQUESTED' else 1)
+            review_entries.append((score, f"{status_emoji} **{review['user']}**: {review_body}\n"))
             if review['body']:
                 has_meaningful_context = True
+        context_parts.extend(pack_lines_by_token_budget(review_entries, REVIEW_TOKEN_BUDGET))
     
     # Priority 4: Always include key file changes (essential for understanding the PR)
     if pr_info.get('files'):
-        context += f"\n## Key Files Changed\n"
-        # Always show the most significant changes
-        sorted_files = sorted(pr_info['files'], key=lambda x: x.get('changes', 0), reverse=True)
-        
-        # Categories for better understanding
-        new_files = [f for f in sorted_files if f.get('status') == 'added']
-        modified_files = [f for f in sorted_files if f.get('status') == 'modified']
-        deleted_files = [f for f in sorted_files if f.get('status') == 'removed']
-        
-        # Always show top changed files regardless of status
-        for file_info in sorted_files[:8]:
-            if file_info.get('changes', 0) > 0:
-                status_emoji = {"added": "🆕", "modified": "✏️", "removed": "🗑️", "renamed": "📝"}.get(file_info['status'], "📄")
-                context += f"{status_emoji} `{file_info['filename']}` (+{file_info['additions']} -{file_info['deletions']})\n"
-        
-        # Add summary of file types and highlight critical changes
-        if len(pr_info['files']) > 8:
-            context += f"\n... and {len(pr_info['files']) - 8} more files ({len(new_files)} new, {len(modified_files)} modified, {len(deleted_files)} deleted)\n"
-        
-        # Identify critical file types for better analysis
+        context_parts.append(f"\n## Key Files Changed\n")
+        # Single pass over the files: count statuses and classify notable files
+        status_counts = Counter()
         critical_files = []
         config_files = []
         dependency_files = []
         
         for file_info in pr_info['files']:
+            status_counts[file_info.get('status')] += 1
+            
+            # Identify critical file types for better analysis
             filename = file_info['filename'].lower()
-            if any(dep in filename for dep in ['package.json', 'package-lock.json', 'requirements.txt', 'composer.json', 'gemfile', 'go.mod', 'cargo.toml', 'poetry.lock']):
+            if DEPENDENCY_FILE_PATTERN.search(filename):
                 dependency_files.append(file_info['filename'])
-            elif any(critical in filename for critical in ['dockerfile', '.env', 'config.js', 'next.config', 'vite.config', 'webpack.config']):
+            elif CRITICAL_FILE_PATTERN.search(filename):
                 critical_files.append(file_info['filename'])
-            elif any(ext in filename for ext in ['.json', '.yml', '.yaml', '.toml', '.config']):
+            elif CONFIG_FILE_PATTERN.search(filename):
                 config_files.append(file_info['filename'])
         
+        # Always show the most significant changes regardless of status
+        top_files = heapq.nlargest(8, pr_info['files'], key=lambda x: x.get('changes', 0))
+        for file_info in top_files:
+            if file_info.get('changes', 0) > 0:
+                status_emoji = FILE_STATUS_EMOJI.get(file_info['status'], "📄")
+                context_parts.append(f"{status_emoji} `{file_info['filename']}` (+{file_info['additions']} -{file_info['deletions']})\n")
+        
+        # Add summary of file types and highlight critical changes
+        if len(pr_info['files']) > 8:
+            context_parts.append(f"\n... and {len(pr_info['files']) - 8} more files ({status_counts['added']} new, {status_counts['modified']} modified, {status_counts['removed']} deleted)\n")
+        
         if dependency_files:
-            context += f"\n📦 Dependencies: {', '.join(dependency_files[:3])}\n"
+            context_parts.append(f"\n📦 Dependencies: {', '.join(dependency_files[:3])}\n")
         if critical_files:
-            context += f"\n⚠️ Critical files: {', '.join(critical_files[:3])}\n"
+            context_parts.append(f"\n⚠️ Critical files: {', '.join(critical_files[:3])}\n")
         if config_files and len(config_files) > 3:
-            context += f"\n🔧 Configuration changes: {len(config_files)} config files modified\n"
+            context_parts.append(f"\n🔧 Configuration changes: {len(config_files)} config files modified\n")
+    
+    context = "".join(context_parts)
     
     prompt = f"""
 Create a CONCISE but COMPLETE PR summary. Ensure ALL major changes are captured.
@@ -503,6 +750,14 @@ CRITICAL:
 - Keep under 1000 characters but don't sacrifice completeness
 """
 
+    # The prompt captures everything the summary depends on, so an identical prompt
+    # (e.g. a close/reopen with no new commits or comments) can reuse the earlier summary
+    prompt_digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    cached_summary = SUMMARY_CACHE.get(prompt_digest)
+    if cached_summary is not None:
+        logger.info("PR content unchanged since last summary - reusing cached summary")
+        return cached_summary
+
     try:
         chat_completion = client.chat.completions.create(
             messages=[
@@ -512,17 +767,20 @@ CRITICAL:
             max_tokens=800,  # Increased to ensure completeness while staying concise
             temperature=0.1
         )
-        return chat_completion.choices[0].message.content
+        summary = chat_completion.choices[0].message.content
+        if summary:
+            SUMMARY_CACHE.put(prompt_digest, summary)
+        return summary
     except Exception as e:
         logger.error(f"Error getting summary from Groq: {e}")
         # If the context is still too large, provide a minimal summary
         simple_prompt = f"""
 BRIEF PR Summary:
 
-**{pr_info['basic']['title']}**
-By: {pr_info['basic']['user']} | {pr_info['basic']['changed_files']} files changed
+**{basic['title']}**
+By: {basic['user']} | {basic['changed_files']} files changed
 
-Description: {pr_info['basic']['description'][:300] if pr_info['basic']['description'] else 'No description provided'}
+Description: {basic['description'][:300] if basic['description'] else 'No description provided'}
 
 Create a 3-4 sentence summary of what this PR accomplishes.
 """
@@ -539,9 +797,12 @@ Create a 3-4 sentence summary of what this PR accomplishes.
             return chat_completion.choices[0].message.content
         except Exception as fallback_error:
             logger.error(f"Fallback summary also failed: {fallback_error}")
-            return f"**{pr_info['basic']['title']}**\n\nAuthor: {pr_info['basic']['user']}\nFiles changed: {pr_info['basic']['changed_files']}\nChanges: +{pr_info['basic']['additions']} -{pr_info['basic']['deletions']}\n\nDescription: {pr_info['basic']['description'][:200] if pr_info['basic']['description'] else 'No description provided'}"
+            return build_basic_summary(basic)
 
 # --- Process PR Event ---
+# PR actions that don't need analysis; rejected in the webhook handler before any API work
+SKIP_ACTIONS = frozenset({'assigned', 'unassigned', 'labeled', 'unlabeled', 'review_requested', 'review_request_removed'})
+
 def process_pr_event(payload):
     """Process a PR event and send analysis to Discord."""
     try:
@@ -559,12 +820,6 @@ def process_pr_event(payload):
         
         logger.info(f"Processing PR {action} event for {owner}/{repo}#{pr_number}")
         
-        # Skip certain actions that don't need analysis
-        skip_actions = ['assigned', 'unassigned', 'labeled', 'unlabeled', 'review_requested', 'review_request_removed']
-        if action in skip_actions:
-            logger.info(f"Skipping action '{action}' - no analysis needed")
-            return True
-        
         # Get comprehensive PR information
         pr_info = get_pr_comprehensive_info(owner, repo, pr_number)
         pr_info['basic']['number'] = pr_number  # Add PR number to basic info
@@ -627,13 +882,16 @@ def github_webhook():
             logger.info(f"Ignoring event type: {event_type}")
             return jsonify({"message": f"Event type '{event_type}' ignored"}), 200
         
-        # Process the PR event
-        success = process_pr_event(payload)
+        # Skip actions that don't need analysis without queueing any work
+        action = payload.get('action')
+        if action in SKIP_ACTIONS:
+            logger.info(f"Skipping action '{action}' - no analysis needed")
+            return jsonify({"message": f"Action '{action}' ignored"}), 200
+        
+        # Queue the PR event and acknowledge right away to stay well within GitHub's delivery timeout
+        EVENT_EXECUTOR.submit(process_pr_event, payload)
         
-        if success:
-            return jsonify({"message": "PR event processed successfully"}), 200
-        else:
-            return jsonify({"error": "Failed to process PR event"}), 500
+        return jsonify({"message": "PR event queued for processing", "queued": True}), 202
             
     except Exception as e:
         logger.error(f"Unexpected error in webhook handler: {e}")
@@ -690,6 +948,7 @@ def internal_error(error):
     return jsonify({"error": "Internal server error"}), 500
 
 # --- Main execution ---
+# Werkzeug's server is for local development only; production runs under gunicorn gthread workers (see railway.toml)
 if __name__ == "__main__":
     # Ensure we have all required configuration
     if not all([GITHUB_TOKEN, GROQ_API_KEY, DISCORD_WEBHOOK_URL]):